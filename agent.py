@@ -3,22 +3,165 @@ Simple AI Agent with Tools
 Basic AI agent that can use tools and chat with users.
 """
 
+import asyncio
+import logging
 import os
-from typing import Dict, List, Any
-from pathlib import Path
+import re
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple, Union
+import msgspec
 from dotenv import load_dotenv
-import google.generativeai as genai
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Tool calls embedded in model output: TOOL_CALL[tool_name:param1=value1,param2=value2]
+_TOOL_CALL_RE = re.compile(r'TOOL_CALL\[([^:]+):([^\]]+)\]')
+_TOOL_CALL_PREFIX = "TOOL_CALL["
+
+# Prior messages sent with each turn; the new user message makes it the last 5
+_SESSION_WINDOW = 4
+
+# Shared by every agent; worker threads are only started once tool calls arrive
+_TOOL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool")
+
+# Plain "<tool> <action> <content>" messages that can skip the model round-trip
+_DIRECT_INTENT_RE = re.compile(r'^\s*(\w+)\s+(\w+)\s+(.*)$', re.S)
+
+
+def _tool_call_start(buffer: str, pos: int) -> int:
+    """Return where a possibly incomplete tool call begins in buffer[pos:], or len(buffer)."""
+    start = buffer.find(_TOOL_CALL_PREFIX, pos)
+    if start != -1:
+        return start
+    
+    # The buffer may end partway through the prefix itself, e.g. "... TOOL_C"
+    for size in range(min(len(_TOOL_CALL_PREFIX) - 1, len(buffer) - pos), 0, -1):
+        if buffer.endswith(_TOOL_CALL_PREFIX[:size]):
+            return len(buffer) - size
+    return len(buffer)
+
+
+def _jit(signature=None):
+    """Decorator for numeric tool helpers: numba-compiled (cached on disk, GIL released) when available."""
+    # Imported here so only modules that actually define jitted helpers pay for numba/llvmlite
+    try:
+        from numba import njit
+    except ImportError:
+        return lambda func: func
+    return njit(signature, cache=True, fastmath=True, nogil=True)
+
+
+class _ToolCallSplicer:
+    """Splits streamed model text into plain text pieces and complete tool-call matches."""
+    
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+    
+    def feed(self, text: str) -> List[Union[str, re.Match]]:
+        """Add a chunk and return everything that is now safe to emit, in order."""
+        self._buffer += text
+        if self._pos == 0:
+            # Nothing emitted yet; drop leading whitespace like the non-streamed reply did
+            self._buffer = self._buffer.lstrip()
+        
+        pieces = []
+        for match in _TOOL_CALL_RE.finditer(self._buffer, self._pos):
+            if match.start() > self._pos:
+                pieces.append(self._buffer[self._pos:match.start()])
+            pieces.append(match)
+            self._pos = match.end()
+        
+        # Hold back anything that could still become a tool call
+        safe_end = _tool_call_start(self._buffer, self._pos)
+        if safe_end > self._pos:
+            pieces.append(self._buffer[self._pos:safe_end])
+            self._pos = safe_end
+        return pieces
+    
+    def flush(self) -> str:
+        """Return the held-back text once the stream has ended."""
+        tail = self._buffer[self._pos:]
+        self._pos = len(self._buffer)
+        return tail
+
+
+def _pop_ready(pending: Deque) -> Iterator[str]:
+    """Pop text and finished tool results off the front of pending, keeping reply order."""
+    while pending and (isinstance(pending[0], str) or pending[0].done()):
+        piece = pending.popleft()
+        yield piece if isinstance(piece, str) else piece.result()
+
+
+async def _read_line(prompt: str) -> str:
+    """input() on a daemon thread, so a pending read never blocks shutdown after Ctrl+C."""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def _settle(setter, value) -> None:
+        if not future.done():
+            setter(value)
+    
+    def _read() -> None:
+        try:
+            line = input(prompt)
+        except BaseException as e:
+            loop.call_soon_threadsafe(_settle, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(_settle, future.set_result, line)
+    
+    threading.Thread(target=_read, daemon=True).start()
+    return await future
+
+
+@lru_cache(maxsize=512)
+def _parse_params(params_str: str) -> tuple:
+    """Parse 'key1=value1,key2=value2' into (key, value) pairs; cached for repeated calls."""
+    return tuple(
+        (key.strip(), value.strip())
+        for key, value in (param_pair.split('=', 1) for param_pair in params_str.split(',') if '=' in param_pair)
+    )
+
+
+@lru_cache(maxsize=4)
+def _get_model(name: str):
+    """Return a Gemini model shared by every agent in the process."""
+    import google.generativeai as genai
+    
+    # genai.configure() sets one process-wide client, so GEMINI_API_KEY is global to all agents
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    return genai.GenerativeModel(name)
+
+
+class Message(msgspec.Struct):
+    """A single conversation turn."""
+    
+    role: str
+    content: str
+
 
 class Tool:
     """Base class for tools."""
     
+    __slots__ = ("name", "description", "_bullet")
+    
+    # Action names execute() understands; lets the agent run plain requests without the model
+    actions: Tuple[str, ...] = ()
+    
     def __init__(self, name: str, description: str):
-        self.name = name
+        self.name = sys.intern(name)
         self.description = description
+        # Preformatted prompt line, reused every time the system prompt is rebuilt
+        self._bullet = f"- {name}: {description}"
     
     def execute(self, **kwargs) -> str:
         """Execute the tool and return result as string."""
@@ -28,155 +171,205 @@ class Tool:
 class TextGenerationTool(Tool):
     """Tool for text generation and writing tasks."""
     
+    __slots__ = ()
+    
+    # task -> result template, formatted with content and style
+    _TEMPLATES = {
+        "generate": "Generated {style} content: {content}",
+        "rewrite": "Rewritten in {style} style: {content}",
+        "brainstorm": "Brainstorming ideas for: {content}",
+        "research": "Research summary for: {content}",
+    }
+    actions = tuple(_TEMPLATES)
+    
     def __init__(self):
         super().__init__("text", "Generate, rewrite, and brainstorm text content")
     
     def execute(self, task: str, content: str = "", style: str = "professional") -> str:
         """Execute text generation tasks."""
-        if task == "generate":
-            return f"Generated {style} content: {content}"
-        elif task == "rewrite":
-            return f"Rewritten in {style} style: {content}"
-        elif task == "brainstorm":
-            return f"Brainstorming ideas for: {content}"
-        elif task == "research":
-            return f"Research summary for: {content}"
-        else:
+        template = self._TEMPLATES.get(task)
+        if template is None:
             return f"Unknown text task: {task}"
+        return template.format(content=content, style=style)
 
 
 class ImageGenerationTool(Tool):
     """Tool for AI-powered image generation and editing."""
     
+    __slots__ = ()
+    
+    # action -> result template, formatted with prompt and style
+    _TEMPLATES = {
+        "generate": "Generated {style} image: '{prompt}' (placeholder - integrate with DALL-E/Midjourney)",
+        "edit": "Edited image with prompt: '{prompt}'",
+        "thumbnail": "Created thumbnail for: '{prompt}'",
+    }
+    actions = tuple(_TEMPLATES)
+    
     def __init__(self):
         super().__init__("image", "Generate and edit images using AI")
     
     def execute(self, action: str, prompt: str = "", style: str = "realistic") -> str:
         """Execute image generation tasks."""
-        if action == "generate":
-            return f"Generated {style} image: '{prompt}' (placeholder - integrate with DALL-E/Midjourney)"
-        elif action == "edit":
-            return f"Edited image with prompt: '{prompt}'"
-        elif action == "thumbnail":
-            return f"Created thumbnail for: '{prompt}'"
-        else:
+        template = self._TEMPLATES.get(action)
+        if template is None:
             return f"Unknown image action: {action}"
+        return template.format(prompt=prompt, style=style)
 
 
 class VideoGenerationTool(Tool):
     """Tool for video generation and editing."""
     
+    __slots__ = ()
+    
+    # action -> result template, formatted with content and duration
+    _TEMPLATES = {
+        "text_to_video": "Generated {duration} video from text: '{content}' (placeholder - integrate with Google Veo 3/Synthesia)",
+        "animate": "Animated image/avatar: '{content}'",
+        "edit": "Edited video: '{content}'",
+    }
+    actions = tuple(_TEMPLATES)
+    
     def __init__(self):
         super().__init__("video", "Generate videos from text and images")
     
     def execute(self, action: str, content: str = "", duration: str = "30s") -> str:
         """Execute video generation tasks."""
-        if action == "text_to_video":
-            return f"Generated {duration} video from text: '{content}' (placeholder - integrate with Google Veo 3/Synthesia)"
-        elif action == "animate":
-            return f"Animated image/avatar: '{content}'"
-        elif action == "edit":
-            return f"Edited video: '{content}'"
-        else:
+        template = self._TEMPLATES.get(action)
+        if template is None:
             return f"Unknown video action: {action}"
+        return template.format(content=content, duration=duration)
 
 
 class AudioTool(Tool):
     """Tool for text-to-speech and audio generation."""
     
+    __slots__ = ()
+    
+    # action -> result template, formatted with text and voice
+    _TEMPLATES = {
+        "tts": "Generated {voice} voice audio: '{text}' (placeholder - integrate with ElevenLabs/OpenAI TTS)",
+        "podcast": "Created podcast segment: '{text}'",
+        "audiobook": "Generated audiobook narration: '{text}'",
+    }
+    actions = tuple(_TEMPLATES)
+    
     def __init__(self):
         super().__init__("audio", "Generate speech and audio content")
     
     def execute(self, action: str, text: str = "", voice: str = "default") -> str:
         """Execute audio generation tasks."""
-        if action == "tts":
-            return f"Generated {voice} voice audio: '{text}' (placeholder - integrate with ElevenLabs/OpenAI TTS)"
-        elif action == "podcast":
-            return f"Created podcast segment: '{text}'"
-        elif action == "audiobook":
-            return f"Generated audiobook narration: '{text}'"
-        else:
+        template = self._TEMPLATES.get(action)
+        if template is None:
             return f"Unknown audio action: {action}"
+        return template.format(text=text, voice=voice)
 
 
 class ContentWorkflowTool(Tool):
     """Tool for content planning and workflow management."""
     
+    __slots__ = ()
+    
+    # action -> result template, formatted with content and date
+    _TEMPLATES = {
+        "plan": "Created content plan: '{content}'",
+        "schedule": "Scheduled content for {date}: '{content}'",
+        "collaborate": "Set up collaboration for: '{content}'",
+        "review": "Content review cycle started for: '{content}'",
+    }
+    actions = tuple(_TEMPLATES)
+    
     def __init__(self):
         super().__init__("workflow", "Manage content calendar and project workflows")
     
     def execute(self, action: str, content: str = "", date: str = "") -> str:
         """Execute workflow management tasks."""
-        if action == "plan":
-            return f"Created content plan: '{content}'"
-        elif action == "schedule":
-            return f"Scheduled content for {date}: '{content}'"
-        elif action == "collaborate":
-            return f"Set up collaboration for: '{content}'"
-        elif action == "review":
-            return f"Content review cycle started for: '{content}'"
-        else:
+        template = self._TEMPLATES.get(action)
+        if template is None:
             return f"Unknown workflow action: {action}"
+        return template.format(content=content, date=date)
 
 
 class SEOTool(Tool):
     """Tool for SEO optimization and content analysis."""
     
+    __slots__ = ()
+    
+    # action -> result template, formatted with content and keywords
+    _TEMPLATES = {
+        "optimize": "SEO optimized content for keywords '{keywords}': {content}",
+        "analyze": "SEO analysis for: '{content}'",
+        "keywords": "Keyword research for: '{content}'",
+        "meta": "Generated meta description for: '{content}'",
+    }
+    actions = tuple(_TEMPLATES)
+    
     def __init__(self):
         super().__init__("seo", "Optimize content for search engines")
     
     def execute(self, action: str, content: str = "", keywords: str = "") -> str:
         """Execute SEO optimization tasks."""
-        if action == "optimize":
-            return f"SEO optimized content for keywords '{keywords}': {content}"
-        elif action == "analyze":
-            return f"SEO analysis for: '{content}'"
-        elif action == "keywords":
-            return f"Keyword research for: '{content}'"
-        elif action == "meta":
-            return f"Generated meta description for: '{content}'"
-        else:
+        template = self._TEMPLATES.get(action)
+        if template is None:
             return f"Unknown SEO action: {action}"
+        return template.format(content=content, keywords=keywords)
 
 
 class SocialMediaTool(Tool):
     """Tool for social media distribution and management."""
     
+    __slots__ = ()
+    
+    # action -> result template, formatted with content and platform
+    _TEMPLATES = {
+        "post": "Posted to {platform}: '{content}'",
+        "schedule": "Scheduled post for {platform}: '{content}'",
+        "analytics": "Analytics report for {platform}: '{content}'",
+        "hashtags": "Generated hashtags for: '{content}'",
+    }
+    actions = tuple(_TEMPLATES)
+    
     def __init__(self):
         super().__init__("social", "Manage social media posting and analytics")
     
     def execute(self, action: str, content: str = "", platform: str = "all") -> str:
         """Execute social media tasks."""
-        if action == "post":
-            return f"Posted to {platform}: '{content}'"
-        elif action == "schedule":
-            return f"Scheduled post for {platform}: '{content}'"
-        elif action == "analytics":
-            return f"Analytics report for {platform}: '{content}'"
-        elif action == "hashtags":
-            return f"Generated hashtags for: '{content}'"
-        else:
+        template = self._TEMPLATES.get(action)
+        if template is None:
             return f"Unknown social media action: {action}"
+        return template.format(content=content, platform=platform)
 
 
 class AIAgent:
     """Simple AI agent with tool support."""
     
+    # /command -> positional parameter names; the last one captures the remaining words
+    _CLI_SPEC = {
+        "text": ("task", "content"),
+        "image": ("action", "prompt"),
+        "video": ("action", "content"),
+        "audio": ("action", "text"),
+        "workflow": ("action", "content"),
+        "seo": ("action", "content"),
+        "social": ("action", "content"),
+        "file": ("action", "path", "content"),
+        "search": ("query",),
+    }
+    
     def __init__(self, name: str = "AI Agent"):
         self.name = name
         self.tools: Dict[str, Tool] = {}
-        self.messages: List[Dict[str, str]] = []
+        # Capped local log; the Gemini session is re-seeded from its tail after each turn
+        self.messages: Deque[Message] = deque(maxlen=64)
+        self._encoder = msgspec.json.Encoder()
+        self._session = None
         
         # Get API key from environment
         self.gemini_key = os.getenv("GEMINI_API_KEY")
         self.openai_key = os.getenv("OPENAI_API_KEY")
         
-        # Configure Gemini if key is available
-        if self.gemini_key:
-            genai.configure(api_key=self.gemini_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.model = None
+        # Gemini is configured lazily on the first chat turn, see _ensure_model()
+        self.model = None
         
         # Register all content creation tools
         self.add_tool(TextGenerationTool())
@@ -187,36 +380,23 @@ class AIAgent:
         self.add_tool(SEOTool())
         self.add_tool(SocialMediaTool())
         
-        print(f"Initialized {self.name}")
+        logger.info("Initialized %s", self.name)
         if self.gemini_key:
-            print("✓ Gemini API key found")
+            logger.info("✓ Gemini API key found")
         if self.openai_key:
-            print("✓ OpenAI API key found")
+            logger.info("✓ OpenAI API key found")
     
     def add_tool(self, tool: Tool) -> None:
         """Add a tool to the agent."""
         self.tools[tool.name] = tool
-        print(f"Added tool: {tool.name}")
-    
-    def use_tool(self, tool_name: str, **kwargs) -> str:
-        """Use a tool and return the result."""
-        if tool_name not in self.tools:
-            return f"Tool '{tool_name}' not found"
-        
-        tool = self.tools[tool_name]
-        print(f"Using tool: {tool_name}")
-        return tool.execute(**kwargs)
+        self._rebuild_prompt()
+        logger.debug("Added tool: %s", tool.name)
     
-    def chat(self, message: str) -> str:
-        """Process a chat message."""
-        self.messages.append({"role": "user", "content": message})
+    def _rebuild_prompt(self) -> None:
+        """Rebuild the cached system prompt from the registered tools."""
+        tools_description = '\n'.join(tool._bullet for tool in self.tools.values())
         
-        if self.model:
-            try:
-                # Create context with conversation history and available tools
-                tools_description = '\n'.join([f"- {name}: {tool.description}" for name, tool in self.tools.items()])
-                
-                context = f"""You are an AI content creation assistant with access to powerful tools. When a user requests something that would benefit from using a tool, automatically use it by including the tool call in your response.
+        self._context_prefix = f"""You are an AI content creation assistant with access to powerful tools. When a user requests something that would benefit from using a tool, automatically use it by including the tool call in your response.
 
 Available Tools:
 {tools_description}
@@ -245,161 +425,250 @@ Parameter Reference:
 - social tool: action, content, platform
 
 Always be helpful and proactive. If a user's request can be fulfilled with a tool, use it automatically. Provide context about what you're doing and why.
-
-Conversation History:
 """
-                # Add recent messages to context
-                for msg in self.messages[-5:]:  # Last 5 messages for context
-                    context += f"{msg['role']}: {msg['content']}\n"
-                
-                # Generate response using Gemini
-                response = self.model.generate_content(context + f"\nUser: {message}\nAssistant:")
-                ai_response = response.text.strip()
-                
-                # Check if the response contains tool calls and execute them
-                ai_response = self._process_tool_calls(ai_response)
-                
-            except Exception as e:
-                ai_response = f"Error with Gemini API: {str(e)}\nAvailable tools: {', '.join(self.tools.keys())}"
-        else:
-            # Fallback if no API key
-            tools_list = ", ".join(self.tools.keys())
-            ai_response = f"No API key configured. Available tools: {tools_list}"
         
-        self.messages.append({"role": "assistant", "content": ai_response})
-        return ai_response
+        # Tools changed after the session started; re-prime it with the new prompt
+        if self._session is not None:
+            self._start_session()
+    
+    def _ensure_model(self) -> None:
+        """Import and configure Gemini on first use so CLI-only runs skip the heavy import."""
+        if self._session is None and self.gemini_key:
+            if self.model is None:
+                self.model = _get_model('gemini-1.5-flash')
+            self._start_session()
+    
+    def _start_session(self) -> None:
+        """Start a Gemini chat session primed with the system prompt."""
+        self._session = self.model.start_chat(history=self._session_history())
+    
+    def _session_history(self) -> list:
+        """Priming turns plus the most recent messages, with tool results already spliced in."""
+        recent = islice(self.messages, max(0, len(self.messages) - _SESSION_WINDOW), None)
+        return [
+            {"role": "user", "parts": [self._context_prefix]},
+            {"role": "model", "parts": ["Understood."]},
+        ] + [
+            {"role": "model" if msg.role == "assistant" else "user", "parts": [msg.content]}
+            for msg in recent
+        ]
+    
+    def use_tool(self, tool_name: str, **kwargs) -> str:
+        """Use a tool and return the result."""
+        tool = self.tools.get(tool_name)
+        if tool is None:
+            return f"Tool '{tool_name}' not found"
+        
+        logger.debug("Using tool: %s", tool_name)
+        return tool.execute(**kwargs)
+    
+    def chat(self, message: str) -> str:
+        """Process a chat message."""
+        return "".join(self.chat_stream(message)).strip()
     
-    def _process_tool_calls(self, response: str) -> str:
-        """Process and execute tool calls in the AI response."""
-        import re
+    def chat_stream(self, message: str) -> Iterator[str]:
+        """Process a chat message, yielding the response as it streams in."""
+        reply = self._start_turn(message)
+        if reply is not None:
+            yield reply
+            return
         
-        # Find all tool calls in the format TOOL_CALL[tool_name:param1=value1,param2=value2]
-        tool_pattern = r'TOOL_CALL\[([^:]+):([^\]]+)\]'
-        matches = re.findall(tool_pattern, response)
+        output = []
+        try:
+            # Stream the response from Gemini; each tool call starts as soon as it is complete
+            # and runs alongside later calls while the stream keeps being read
+            splicer = _ToolCallSplicer()
+            pending = deque()
+            for chunk in self._session.send_message(message, stream=True):
+                for piece in splicer.feed(chunk.text):
+                    pending.append(
+                        _TOOL_POOL.submit(self._dispatch, *piece.groups()) if isinstance(piece, re.Match) else piece
+                    )
+                for piece in _pop_ready(pending):
+                    output.append(piece)
+                    yield output[-1]
+            
+            pending.append(splicer.flush())
+            for piece in pending:
+                output.append(piece if isinstance(piece, str) else piece.result())
+                yield output[-1]
+            
+        except Exception as e:
+            output.append(self._api_error(e))
+            yield output[-1]
         
-        processed_response = response
+        finally:
+            # Record the turn even if the caller stops iterating or the task is cancelled
+            self._finish_turn("".join(output))
+    
+    async def chat_async(self, message: str) -> str:
+        """Process a chat message without blocking the event loop."""
+        return "".join([piece async for piece in self.chat_stream_async(message)]).strip()
+    
+    async def chat_stream_async(self, message: str) -> AsyncIterator[str]:
+        """Async version of chat_stream() backed by Gemini's async client."""
+        reply = self._start_turn(message)
+        if reply is not None:
+            yield reply
+            return
+        
+        output = []
+        pending = deque()
+        try:
+            splicer = _ToolCallSplicer()
+            async for chunk in await self._session.send_message_async(message, stream=True):
+                # Tool calls run as tasks while later chunks are still arriving
+                for piece in splicer.feed(chunk.text):
+                    pending.append(
+                        asyncio.ensure_future(self._use_tool_async(*piece.groups()))
+                        if isinstance(piece, re.Match) else piece
+                    )
+                for piece in _pop_ready(pending):
+                    output.append(piece)
+                    yield output[-1]
+            
+            pending.append(splicer.flush())
+            while pending:
+                piece = pending.popleft()
+                output.append(piece if isinstance(piece, str) else await piece)
+                yield output[-1]
+            
+        except Exception as e:
+            output.append(self._api_error(e))
+            yield output[-1]
         
-        for tool_name, params_str in matches:
+        finally:
+            for piece in pending:
+                if not isinstance(piece, str):
+                    piece.cancel()
+            # Record the turn even if the caller stops iterating or the task is cancelled
+            self._finish_turn("".join(output))
+    
+    def _start_turn(self, message: str) -> Optional[str]:
+        """Record the user message; return the reply if the turn needs no model call."""
+        reply = self._direct_intent(message)
+        if reply is None:
             try:
-                # Parse parameters
-                params = {}
-                if params_str.strip():
-                    for param_pair in params_str.split(','):
-                        if '=' in param_pair:
-                            key, value = param_pair.split('=', 1)
-                            params[key.strip()] = value.strip()
-                
-                # Execute the tool
-                result = self.use_tool(tool_name.strip(), **params)
-                
-                # Replace the tool call with the result
-                tool_call_text = f"TOOL_CALL[{tool_name}:{params_str}]"
-                processed_response = processed_response.replace(
-                    tool_call_text, 
-                    f"\n**Tool Result ({tool_name}):** {result}\n"
-                )
-                
+                self._ensure_model()
             except Exception as e:
-                # Replace with error message
-                tool_call_text = f"TOOL_CALL[{tool_name}:{params_str}]"
-                processed_response = processed_response.replace(
-                    tool_call_text, 
-                    f"\n**Tool Error ({tool_name}):** {str(e)}\n"
-                )
+                # A missing or broken SDK only surfaces here now that the import is lazy
+                reply = self._api_error(e)
+            else:
+                if self._session is None:
+                    # Fallback if no API key
+                    tools_list = ", ".join(self.tools.keys())
+                    reply = f"No API key configured. Available tools: {tools_list}"
+        
+        self._record("user", message)
+        if reply is not None:
+            self._finish_turn(reply)
+        return reply
+    
+    def _finish_turn(self, reply: str) -> None:
+        """Record the assistant reply for the current turn."""
+        self._record("assistant", reply.strip())
         
-        return processed_response
+        # ChatSession resends its whole history on every message; keep it to the recent window
+        if self._session is not None:
+            self._session.history = self._session_history()
     
-    def run(self) -> None:
+    def _api_error(self, error: Exception) -> str:
+        """Format a Gemini failure as the assistant reply."""
+        return f"Error with Gemini API: {str(error)}\nAvailable tools: {', '.join(self.tools.keys())}"
+    
+    def _direct_intent(self, message: str) -> Optional[str]:
+        """Run a message like "image generate sunset" straight through its tool, or return None."""
+        match = _DIRECT_INTENT_RE.match(message)
+        if match is None:
+            return None
+        
+        tool_name, action, content = match.group(1).lower(), match.group(2).lower(), match.group(3).strip()
+        tool = self.tools.get(tool_name)
+        spec = self._CLI_SPEC.get(tool_name)
+        # Only short-circuit actions the tool knows, so ordinary sentences still reach the model
+        if tool is None or spec is None or len(spec) != 2 or action not in tool.actions:
+            return None
+        
+        action_param, content_param = spec
+        return self.use_tool(tool_name, **{action_param: action, content_param: content})
+    
+    def _record(self, role: str, content: str) -> None:
+        """Append a message to the conversation history."""
+        self.messages.append(Message(role=role, content=content))
+    
+    def dump(self) -> bytes:
+        """Serialize the conversation history to JSON."""
+        return self._encoder.encode(list(self.messages))
+    
+    def _dispatch(self, tool_name: str, params_str: str) -> str:
+        """Execute a single tool call and format its result."""
+        tool_name = tool_name.strip()
+        try:
+            result = self.use_tool(tool_name, **dict(_parse_params(params_str)))
+            return f"\n**Tool Result ({tool_name}):** {result}\n"
+            
+        except Exception as e:
+            # Replace with error message
+            return f"\n**Tool Error ({tool_name}):** {str(e)}\n"
+    
+    async def _use_tool_async(self, tool_name: str, params_str: str) -> str:
+        """Run a tool call on the shared tool pool and await its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_TOOL_POOL, self._dispatch, tool_name, params_str)
+    
+    async def run(self) -> None:
         """Run interactive chat."""
         print(f"\n{self.name} started. Type 'quit' to exit.")
         
         while True:
-            try:
-                user_input = input("\nYou: ").strip()
-                
-                if user_input.lower() in ['quit', 'exit']:
-                    print("Goodbye!")
-                    break
-                
-                if not user_input:
-                    continue
-                
-                # Check for tool commands
-                if user_input.startswith("/"):
-                    parts = user_input[1:].split()
-                    if parts:
-                        tool_name = parts[0]
-                        
-                        # Text generation tool
-                        if tool_name == "text" and len(parts) >= 2:
-                            task = parts[1]
-                            content = " ".join(parts[2:]) if len(parts) > 2 else ""
-                            result = self.use_tool("text", task=task, content=content)
-                            print(f"Tool result: {result}")
-                        
-                        # Image generation tool
-                        elif tool_name == "image" and len(parts) >= 2:
-                            action = parts[1]
-                            prompt = " ".join(parts[2:]) if len(parts) > 2 else ""
-                            result = self.use_tool("image", action=action, prompt=prompt)
-                            print(f"Tool result: {result}")
-                        
-                        # Video generation tool
-                        elif tool_name == "video" and len(parts) >= 2:
-                            action = parts[1]
-                            content = " ".join(parts[2:]) if len(parts) > 2 else ""
-                            result = self.use_tool("video", action=action, content=content)
-                            print(f"Tool result: {result}")
-                        
-                        # Audio tool
-                        elif tool_name == "audio" and len(parts) >= 2:
-                            action = parts[1]
-                            text = " ".join(parts[2:]) if len(parts) > 2 else ""
-                            result = self.use_tool("audio", action=action, text=text)
-                            print(f"Tool result: {result}")
-                        
-                        # Workflow tool
-                        elif tool_name == "workflow" and len(parts) >= 2:
-                            action = parts[1]
-                            content = " ".join(parts[2:]) if len(parts) > 2 else ""
-                            result = self.use_tool("workflow", action=action, content=content)
-                            print(f"Tool result: {result}")
-                        
-                        # SEO tool
-                        elif tool_name == "seo" and len(parts) >= 2:
-                            action = parts[1]
-                            content = " ".join(parts[2:]) if len(parts) > 2 else ""
-                            result = self.use_tool("seo", action=action, content=content)
-                            print(f"Tool result: {result}")
-                        
-                        # Social media tool
-                        elif tool_name == "social" and len(parts) >= 2:
-                            action = parts[1]
-                            content = " ".join(parts[2:]) if len(parts) > 2 else ""
-                            result = self.use_tool("social", action=action, content=content)
-                            print(f"Tool result: {result}")
-                        
-                        else:
-                            print("Available tools:")
-                            print("  /file read|write|list <path> [content]")
-                            print("  /search <query>")
-                            print("  /text generate|rewrite|brainstorm|research <content>")
-                            print("  /image generate|edit|thumbnail <prompt>")
-                            print("  /video text_to_video|animate|edit <content>")
-                            print("  /audio tts|podcast|audiobook <text>")
-                            print("  /workflow plan|schedule|collaborate|review <content>")
-                            print("  /seo optimize|analyze|keywords|meta <content>")
-                            print("  /social post|schedule|analytics|hashtags <content>")
-                else:
-                    response = self.chat(user_input)
-                    print(f"Agent: {response}")
-                    
-            except KeyboardInterrupt:
-                print("\nGoodbye!")
+            user_input = (await _read_line("\nYou: ")).strip()
+            
+            if user_input.lower() in ['quit', 'exit']:
+                print("Goodbye!")
                 break
+            
+            if not user_input:
+                continue
+            
+            # Check for tool commands
+            if user_input.startswith("/"):
+                parts = user_input[1:].split(maxsplit=1)
+                if parts:
+                    tool_name = parts[0]
+                    
+                    spec = self._CLI_SPEC.get(tool_name)
+                    
+                    if spec and len(parts) >= 2:
+                        # Split off only the fixed positional params; the last one keeps the rest verbatim
+                        args = parts[1].split(maxsplit=len(spec) - 1)
+                        kwargs = dict(zip(spec, args))
+                        kwargs.setdefault(spec[-1], "")
+                        result = self.use_tool(tool_name, **kwargs)
+                        print(f"Tool result: {result}")
+                    
+                    else:
+                        print("Available tools:")
+                        print("  /file read|write|list <path> [content]")
+                        print("  /search <query>")
+                        print("  /text generate|rewrite|brainstorm|research <content>")
+                        print("  /image generate|edit|thumbnail <prompt>")
+                        print("  /video text_to_video|animate|edit <content>")
+                        print("  /audio tts|podcast|audiobook <text>")
+                        print("  /workflow plan|schedule|collaborate|review <content>")
+                        print("  /seo optimize|analyze|keywords|meta <content>")
+                        print("  /social post|schedule|analytics|hashtags <content>")
+            else:
+                print("Agent: ", end="", flush=True)
+                async for piece in self.chat_stream_async(user_input):
+                    print(piece, end="", flush=True)
+                print()
 
 
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     agent = AIAgent("Content Agent")
-    agent.run()
\ No newline at end of file
+    try:
+        asyncio.run(agent.run())
+    except KeyboardInterrupt:
+        print("\nGoodbye!")
\ No newline at end of file